@@ -2,7 +2,38 @@
 #
 # Copyright 2014 Cole Maclean
 """Tornado forms: simple form validation. 
+
+Submodules are imported on first attribute access, to keep
+`import tornforms` cheap for worker startup. Requires Python 3.7+.
 """
-from tornforms.utils import FormError, ErrorList, with_form
-from tornforms.forms import Form
-from tornforms.fields import *
\ No newline at end of file
+_exports = {
+    'tornforms.utils': ('FormError', 'ErrorList', 'with_form', 'decapitalize'),
+    'tornforms.forms': ('Form',),
+    'tornforms.fields': ('BaseField', 'TextField', 'EmailField', 'IntField',
+        'DecimalField', 'FloatField', 'DateField', 'TimeField'),
+    'tornforms.requirements': ('BaseRequirement', 'Required', 'MinLength',
+        'MaxLength', 'MinValue', 'MaxValue', 'MaxDigits', 'DecimalPlaces',
+        'InList', 'NotInList', 'Regex'),
+}
+
+_submodules = ('fields', 'forms', 'requirements', 'utils')
+
+_modules = dict((name, module) for module, names in _exports.items()
+    for name in names)
+
+__all__ = sorted(_modules)
+
+def __getattr__(name):
+    if name in _submodules:
+        return __import__('tornforms.' + name, fromlist=[name])
+    try:
+        module = _modules[name]
+    except KeyError:
+        raise AttributeError("module 'tornforms' has no attribute '{0}'".format(
+            name)) from None
+    value = getattr(__import__(module, fromlist=[name]), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_submodules))
@@ -7,6 +7,8 @@ Form fields.
 """
 
 import re
+import sys
+import math
 import decimal
 
 from tornforms.requirements import *
@@ -15,24 +17,38 @@ from tornforms.utils import FormError, ErrorList, decapitalize
 class BaseField(object):
     """Abstract base class for form fields.
     """
-    def __init__(self, required=False, in_list=False, not_in_list=False, regex=False, messages={}):
-        self.reqs = []
+    # Requirements are never modified, so fields using the default message
+    # can share one
+    REQUIRED = Required()
+    
+    def __init__(self, required=False, in_list=False, not_in_list=False, regex=False,
+        messages={}, reqs=()):
+        field_reqs = []
         
         if required:
-            req = Required(message=messages.get('required'))
-            self.reqs.append(req)
+            if 'required' in messages:
+                req = Required(message=messages['required'])
+            else:
+                req = self.REQUIRED
+            field_reqs.append(req)
             
         if in_list:
             req = InList(in_list, message=messages.get('in_list'))
-            self.reqs.append(req)
+            field_reqs.append(req)
             
         if not_in_list:
             req = NotInList(not_in_list, message=messages.get('not_in_list'))
-            self.reqs.append(req)
+            field_reqs.append(req)
             
         if regex:
-            req = Regex(regex, message=messages.get('regex'))
-            self.reqs.append(req)
+            req = requirement(Regex, regex, messages.get('regex'))
+            field_reqs.append(req)
+        
+        # Subclass requirements are passed in, so the tuple is only
+        # built once. Fields are shared between requests (and threads), so
+        # the requirements are frozen once built.
+        field_reqs.extend(reqs)
+        self.reqs = tuple(field_reqs)
     
     def to_python(self, val):
         """Returns str."""
@@ -79,19 +95,24 @@ class TextField(BaseField):
     min_length - check for minimum value length int
     max_length - check for maximum value length int
     messages - custom messages dict
+    reqs - additional requirements, checked last
     """
     def __init__(self, required=False, in_list=False, not_in_list=False, regex=False,
-        min_length=False, max_length=False, messages={}):
-        super(TextField, self).__init__(required=required, in_list=in_list,
-            not_in_list=not_in_list, regex=regex, messages=messages)
+        min_length=False, max_length=False, messages={}, reqs=()):
+        field_reqs = []
         
         if min_length:
-            req = MinLength(min_length, message=messages.get('min_length'))
-            self.reqs.append(req)
+            req = requirement(MinLength, min_length, messages.get('min_length'))
+            field_reqs.append(req)
             
         if max_length:
-            req = MaxLength(max_length, message=messages.get('max_length'))
-            self.reqs.append(req)
+            req = requirement(MaxLength, max_length, messages.get('max_length'))
+            field_reqs.append(req)
+        
+        field_reqs.extend(reqs)
+        super(TextField, self).__init__(required=required, in_list=in_list,
+            not_in_list=not_in_list, regex=regex, messages=messages,
+            reqs=field_reqs)
         
     def to_python(self, val):
         """Returns None or str."""
@@ -116,18 +137,42 @@ class EmailField(TextField):
     messages - custom messages dict
     """
     EMAIL_VALIDATOR = re.compile(r"[^@]+@[^@]+\.[^@]+")
+    EMAIL_REQUIRED = Regex(EMAIL_VALIDATOR)
     
     def __init__(self, required=False, in_list=False, not_in_list=False, regex=False,
         min_length=False, max_length=False,messages={}):
+        if 'regex' in messages:
+            req = Regex(self.EMAIL_VALIDATOR, message=messages['regex'])
+        else:
+            req = self.EMAIL_REQUIRED
         super(EmailField, self).__init__(required=required, in_list=in_list,
             not_in_list=not_in_list, regex=regex, min_length=False,
-            max_length=False, messages=messages)
-        req = Regex(self.EMAIL_VALIDATOR, message=messages.get('regex'))
-        self.reqs.append(req)
+            max_length=False, messages=messages, reqs=(req,))
+
+# int() refuses longer strings (Python 3.11+)
+try:
+    INT_MAX_STR_DIGITS = sys.get_int_max_str_digits()
+except AttributeError:
+    INT_MAX_STR_DIGITS = 0
+
+def _limit_digits(limit):
+    """Returns the number of integer digits in a positive (non-int) limit,
+    or None.
+    """
+    try:
+        return len(str(int(limit)))
+    except (OverflowError, ValueError):
+        # inf, nan or too long to convert; compare normally
+        return None
 
 class IntField(BaseField):
     """Int field handler.
     
+    Input is checked for length, digit count and sign before conversion, so
+    oversized values are rejected without building huge ints. Values with
+    more digits than the min/max value limits, or the wrong sign, fail those
+    requirements directly. Ints are used as given.
+    
     Keyword args:
     required - required field boolean
     in_list - check for value included in list
@@ -135,49 +180,241 @@ class IntField(BaseField):
     regex - check for regex match
     min_value - check for minimum value int
     max_value - check for maximum value int
+    max_digits - check for maximum number of digits int
     messages - custom messages dict
+    reqs - additional requirements, checked last
     """
+    MAX_DIGITS = min(4300, INT_MAX_STR_DIGITS or 4300)
+    # max_digits is limited by int()
+    INT_DIGITS = True
+    max_digits = MAX_DIGITS
+    min_req = max_req = digits_req = None
+    # Integer digits in the min/max value limits; values (of the same sign)
+    # with more digits are out of range
+    min_value_digits = max_value_digits = None
+    # No fraction or exponent for ints
+    NUMBER_VALIDATOR = re.compile(
+        r"(?P<sign>[+-]?)(?P<int>\d+)(?P<frac>)(?P<exp>)\Z")
+    NUMBER_TYPES = (int,)
+    message = "Please enter a whole number."
+    
     def __init__(self, required=False, in_list=False, not_in_list=False, regex=False,
-        min_value=False, max_value=False, messages={}):
-        super(IntField, self).__init__(required=required, in_list=in_list,
-            not_in_list=not_in_list, regex=regex, messages=messages)
+        min_value=False, max_value=False, max_digits=None, messages={}, reqs=()):
+        if 'invalid' in messages:
+            self.message = messages['invalid']
         
+        field_reqs = []
         if min_value:
-            req = MinValue(min_value, message=messages.get('min_value'))
-            self.reqs.append(req)
+            self.min_req = requirement(MinValue, min_value,
+                messages.get('min_value'))
+            field_reqs.append(self.min_req)
+            if min_value < 0:
+                self.min_value_digits = (len(str(-min_value))
+                    if type(min_value) is int else _limit_digits(-min_value))
             
         if max_value:
-            req = MaxValue(max_value, message=messages.get('max_value'))
-            self.reqs.append(req)
+            self.max_req = requirement(MaxValue, max_value,
+                messages.get('max_value'))
+            field_reqs.append(self.max_req)
+            if max_value > 0:
+                self.max_value_digits = (len(str(max_value))
+                    if type(max_value) is int else _limit_digits(max_value))
             
-    def to_python(self, val):
-        """Returns int."""
+        if max_digits is not None:
+            if self.INT_DIGITS and max_digits > INT_MAX_STR_DIGITS > 0:
+                raise ValueError("max_digits must be at most {0}.".format(
+                    INT_MAX_STR_DIGITS))
+            self.max_digits = max_digits
+            self.digits_req = requirement(MaxDigits, max_digits,
+                messages.get('max_digits'))
+            field_reqs.append(self.digits_req)
+        
+        field_reqs.extend(reqs)
+        super(IntField, self).__init__(required=required, in_list=in_list,
+            not_in_list=not_in_list, regex=regex, messages=messages,
+            reqs=field_reqs)
+            
+    def fail(self, req, **params):
+        """Raise the FormError for a requirement, or for invalid input."""
+        if req is None:
+            raise FormError(self.message, params={})
+        raise FormError(req.message, params=params)
+    
+    def match_number(self, val):
+        """Check raw input against the field limits before conversion.
+        Returns (digits, decimal places), raises FormError.
+        """
+        # Room for a sign, decimal point, exponent and a few leading zeros
+        if len(val) > self.max_digits + 16:
+            raise FormError(self.message, params={})
+        matches = self.NUMBER_VALIDATOR.match(val)
+        if not matches or not (matches.group('int') or matches.group('frac')):
+            raise FormError(self.message, params={})
+        
+        sign, frac = matches.group('sign'), matches.group('frac') or ''
+        coefficient = (matches.group('int') + frac).lstrip('0')
+        exponent = int(matches.group('exp') or 0) - len(frac)
+        digits, places = digit_count(len(coefficient) or 1, exponent)
+        
+        if digits > self.max_digits:
+            self.fail(self.digits_req, digits=self.max_digits)
+        
+        # Values with the wrong sign, or more integer digits than the limit,
+        # are out of range
+        int_digits = len(coefficient) + exponent if coefficient else 0
+        if coefficient and sign == '-':
+            req, limit_digits = self.min_req, self.min_value_digits
+            out_of_range = req is not None and req.args[0] > 0
+        else:
+            req, limit_digits = self.max_req, self.max_value_digits
+            out_of_range = req is not None and req.args[0] < 0
+        if out_of_range or (limit_digits is not None and
+                int_digits > limit_digits):
+            raise FormError(req.message, params={'limit': req.args[0]})
+        
+        return digits, places
+    
+    def check_number(self, val):
+        """Returns None, a number (of NUMBER_TYPES) or a checked number str,
+        raises FormError.
+        """
         val = super(IntField, self).to_python(val)
-        if val in ('', None):
+        if val is None or val == '':
             return None
-        else:
+        if isinstance(val, self.NUMBER_TYPES) and not isinstance(val, bool):
+            return val
+        if not hasattr(val, 'strip'):
+            raise FormError(self.message, params={})
+        val = val.strip()
+        self.match_number(val)
+        return val
+            
+    def to_python(self, val):
+        """Returns int."""
+        val = self.check_number(val)
+        if val is None or isinstance(val, int):
+            return val
+        try:
             return int(val, base=10)
+        except ValueError:
+            raise FormError(self.message, params={})
 
-class DecimalField(IntField):
+class FloatField(IntField):
+    """Float field handler.
+    
+    As `IntField`, but accepts a decimal point and exponent and cleans to
+    float, which is faster to parse and compare than decimal. Values too
+    large for a float are rejected. Ints, floats and decimals are used as
+    given.
+    
+    Keyword args:
+    required - required field boolean
+    in_list - check for value included in list
+    not_in_list - check for value excluded from list
+    regex - check for regex match
+    min_value - check for minimum value
+    max_value - check for maximum value
+    max_digits - check for maximum number of digits int
+    decimal_places - check for maximum number of decimal places int
+    messages - custom messages dict
+    """
+    NUMBER_VALIDATOR = re.compile(r"(?P<sign>[+-]?)(?P<int>\d*)"
+        r"(?:\.(?P<frac>\d*))?(?:[eE](?P<exp>[+-]?\d{1,6}))?\Z")
+    MAX_DIGITS = max_digits = 4300
+    INT_DIGITS = False
+    NUMBER_TYPES = (int, float, decimal.Decimal)
+    message = "Please enter a number."
+    places_req = None
+    
+    def __init__(self, required=False, in_list=False, not_in_list=False, regex=False,
+        min_value=False, max_value=False, max_digits=None, decimal_places=None,
+        messages={}):
+        field_reqs = ()
+        if decimal_places is not None:
+            self.places_req = requirement(DecimalPlaces, decimal_places,
+                messages.get('decimal_places'))
+            field_reqs = (self.places_req,)
+        
+        super(FloatField, self).__init__(required=required, in_list=in_list,
+            not_in_list=not_in_list, regex=regex, min_value=min_value,
+            max_value=max_value, max_digits=max_digits, messages=messages,
+            reqs=field_reqs)
+        
+    def match_number(self, val):
+        digits, places = super(FloatField, self).match_number(val)
+        if self.places_req is not None and places > self.places_req.args[0]:
+            self.fail(self.places_req, places=self.places_req.args[0])
+        return digits, places
+    
+    def to_python(self, val):
+        """Returns float."""
+        val = self.check_number(val)
+        if val is None:
+            return None
+        val = float(val)
+        if not math.isfinite(val):
+            raise FormError(self.message, params={})
+        return val
+
+class DecimalField(FloatField):
     """Decimal field handler.
     
+    As `FloatField`, but cleans to decimal. Values are parsed once, under a
+    copy of `context` (default: the current decimal context with precision
+    `max_digits`), so parsing never changes the field's context.
+    
     Keyword args:
     required - required field boolean
     in_list - check for value included in list
     not_in_list - check for value excluded from list
     regex - check for regex match
-    min_value - check for minimum value int
-    max_value - check for maximum value int
+    min_value - check for minimum value
+    max_value - check for maximum value
+    max_digits - check for maximum number of digits int (defaults to
+        context precision)
+    decimal_places - check for maximum number of decimal places int
+    context - decimal.Context used for parsing
     messages - custom messages dict
     """
     
+    def __init__(self, required=False, in_list=False, not_in_list=False, regex=False,
+        min_value=False, max_value=False, max_digits=None, decimal_places=None,
+        context=None, messages={}):
+        context = (context or decimal.getcontext()).copy()
+        if max_digits:
+            context.prec = max_digits
+        context.traps[decimal.Inexact] = True
+        context.clear_flags()
+        self._context = context
+        
+        super(DecimalField, self).__init__(required=required, in_list=in_list,
+            not_in_list=not_in_list, regex=regex, min_value=min_value,
+            max_value=max_value, max_digits=max_digits,
+            decimal_places=decimal_places, messages=messages)
+        if not max_digits:
+            self.max_digits = context.prec
+        
+    @property
+    def context(self):
+        """Returns a copy of the parsing context."""
+        return self._context.copy()
+    
     def to_python(self, val):
         """Returns decimal."""
-        val = super(DecimalField, self).to_python(val)
-        if val in ('', None):
+        val = self.check_number(val)
+        if val is None:
             return None
-        else:
-            return decimal.Decimal(val)
+        if isinstance(val, float):
+            # Parse floats as written, not their exact binary value
+            val = repr(val)
+        try:
+            # Parse under a copy, signals set flags on the context
+            val = self._context.copy().create_decimal(val)
+        except decimal.DecimalException:
+            raise FormError(self.message, params={})
+        if not val.is_finite():
+            raise FormError(self.message, params={})
+        return val
 
 class DateField(BaseField):
     """Date field handler.
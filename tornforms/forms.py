@@ -1,15 +1,19 @@
-import json
+import types
 
-from tornforms.utils import FormError
+from tornforms.utils import FormError, ErrorList
 
 class Form(object):
     """Unbound form object.
     Does not store data or errors, just fields.
-    """
-    errors, data = {}, {}
     
+    tornforms never modifies a form, its fields or requirements after
+    construction, so a single instance can be shared by every request and
+    validated from many threads at once, as long as application code
+    doesn't modify them either. All per-request state lives in the returned
+    data/errors and `BoundForm`.
+    """
     def __init__(self, **fields):
-        self.fields = fields
+        self.fields = types.MappingProxyType(fields)
         
     def validations(self):
         obj = dict()
@@ -23,7 +27,18 @@ class Form(object):
         
         raw_data - dict or data accessor (e.g. `lambda k, d: dict().get(k, d)`)
         """
-        cleaned_data = {}
+        cleaned_data, errors = self.coerce(raw_data)
+        return cleaned_data
+        
+    def coerce(self, raw_data):
+        """Convert raw data with each field's `to_python`.
+        Returns a tuple of cleaned data and conversion errors.
+        
+        Arguments:
+        
+        raw_data - dict or data accessor (e.g. `lambda k, d: dict().get(k, d)`)
+        """
+        cleaned_data, errors = {}, {}
         for name, field in self.fields.items():
             try:
                 val = raw_data(name, None)
@@ -31,19 +46,22 @@ class Form(object):
                 val = raw_data.get(name, None)
             try:
                 cleaned_data[name] = field.to_python(val)
+            except FormError as e:
+                errors[name] = ErrorList([e])
             except Exception as e:
                 pass
         
-        return cleaned_data
+        return cleaned_data, errors
         
     def validate(self, raw_data):
         """
         Arguments:
         
         raw_data - dict or data accessor (function, called with key)"""
-        cleaned_data = self.clean(raw_data)
-        errors = {}
+        cleaned_data, errors = self.coerce(raw_data)
         for name, field in self.fields.items():
+            if name in errors:
+                continue
             field_errors = field.validate(cleaned_data.get(name))
             if field_errors:
                 errors[name] = field_errors
@@ -62,14 +80,16 @@ class BoundForm:
         self.unbound_form = form
         
         accessor = lambda k, d: handler.get_argument(k, default=d, strip=True)
-        self.data, self.errors = self.unbound_form.validate(accessor)
-        self.is_valid = not bool(self.errors)
+        self.data, errors = self.unbound_form.validate(accessor)
+        self.is_valid = not bool(errors)
         
-        for field, field_errors in self.errors.items():
-            for index, error in enumerate(field_errors):
-                # Update in place
-                translated = handler.locale.translate(error.message).format(**error.params)
-                self.errors[field][index] = translated
+        # Build new lists rather than updating in place, errors belong to
+        # this request only
+        self.errors = {}
+        for field, field_errors in errors.items():
+            self.errors[field] = ErrorList(
+                handler.locale.translate(error.message).format(**error.params)
+                for error in field_errors)
         
     @property
     def fields(self):
@@ -80,9 +100,11 @@ class BoundForm:
         if field in self.errors:
             self.errors[field].append(error)
         else:
-            self.errors[field] = [error]
+            self.errors[field] = ErrorList([error])
     
     def to_json(self):
+        # json is only needed here, don't import it at startup
+        import json
         return json.dumps({
             'validations': self.unbound_form.validations(),
             'data': self.data,
@@ -6,13 +6,54 @@
 Requirement validation.
 """
 
+import re
+import types
+import decimal
+import functools
+
 from tornforms.utils import FormError
 
+def digit_count(length, exponent):
+    """Returns (digits, decimal places) of a number written in fixed point,
+    from its coefficient length and exponent (as in `Decimal.as_tuple`).
+    """
+    if exponent >= 0:
+        return length + exponent, 0
+    return max(length, -exponent), -exponent
+
+def number_digits(val):
+    """Returns (digits, decimal places) of an int, float or decimal, or
+    None if it isn't finite.
+    """
+    if isinstance(val, float):
+        # repr is the shortest string that round trips
+        val = decimal.Decimal(repr(val))
+    elif not isinstance(val, decimal.Decimal):
+        val = decimal.Decimal(val)
+    if not val.is_finite():
+        return None
+    sign, digits, exponent = val.as_tuple()
+    return digit_count(len(digits), exponent)
+
+@functools.lru_cache(maxsize=1024)
+def _shared_requirement(cls, value):
+    return cls(value)
+
+def requirement(cls, value, message=None):
+    """Returns a `cls` requirement for `value`.
+    
+    Requirements are never modified after construction, so ones with an
+    int or str value and the default message are shared between fields.
+    """
+    if message is None and type(value) in (int, str):
+        return _shared_requirement(cls, value)
+    return cls(value, message=message)
+
 class BaseRequirement(object):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, message=None):
         self.args = args
-        if kwargs.get('message') is not None:
-            self.message = kwargs.get('message')
+        if message is not None:
+            self.message = message
             
     def __repr__(self):
         name = self.__class__.__name__.lower()
@@ -69,23 +110,87 @@ class MaxValue(BaseRequirement):
         if val and val > self.args[0]:
             raise FormError(self.message, params={'limit': self.args[0]})
 
-class InList(BaseRequirement):
+class MaxDigits(BaseRequirement):
+    message = "{digits} digits maximum, please."
+    
+    def test(self, val):
+        if val is None:
+            return
+        counts = number_digits(val)
+        if counts is None or counts[0] > self.args[0]:
+            raise FormError(self.message, params={'digits': self.args[0]})
+            
+class DecimalPlaces(BaseRequirement):
+    message = "{places} decimal places maximum, please."
+    
+    def test(self, val):
+        if val is None:
+            return
+        counts = number_digits(val)
+        if counts is None or counts[1] > self.args[0]:
+            raise FormError(self.message, params={'places': self.args[0]})
+
+class BaseListRequirement(BaseRequirement):
+    """Base class for requirements checking a list of values.
+    
+    Requirements are shared between requests (and threads), so list, set
+    and dict arguments are copied when the requirement is built. Other
+    iterables (e.g. `range`) are used as given.
+    """
+    def __init__(self, values, message=None):
+        if isinstance(values, list):
+            values = tuple(values)
+        elif isinstance(values, (set, frozenset)):
+            values = frozenset(values)
+        elif isinstance(values, dict):
+            values = types.MappingProxyType(dict(values))
+        self.args = (values,)
+        if message is not None:
+            self.message = message
+        
+    def values(self):
+        """Returns the values as a list, sets in a stable order."""
+        if isinstance(self.args[0], frozenset):
+            return sorted(self.args[0], key=str)
+        return list(self.args[0])
+        
+    def to_dict(self):
+        obj = super(BaseListRequirement, self).to_dict()
+        obj['value'] = self.values()
+        return obj
+        
+    def error(self):
+        values = ", ".join(str(value) for value in self.values())
+        return FormError(self.message, params={'list': values})
+
+class InList(BaseListRequirement):
     message = "This field must be one of: {list}."
     
     def test(self, val):
         if val not in self.args[0]:
-            raise FormError(self.message, params={'list': ", ".join(self.args[0])})
+            raise self.error()
             
-class NotInList(BaseRequirement):
+class NotInList(BaseListRequirement):
     message = "This field must not be one of: {list}."
     
     def test(self, val):
         if val in self.args[0]:
-            raise FormError(self.message, params={'list': ", ".join(self.args[0])})
+            raise self.error()
             
 class Regex(BaseRequirement):
     message = "This entry is invalid."
     
+    def __init__(self, pattern, message=None):
+        # Compile once when the form is defined, not on each test
+        if not hasattr(pattern, 'match'):
+            pattern = re.compile(pattern)
+        super(Regex, self).__init__(pattern, message=message)
+        
+    def to_dict(self):
+        obj = super(Regex, self).to_dict()
+        obj['value'] = self.args[0].pattern
+        return obj
+    
     def test(self, val):
         try:
             matches = self.args[0].match(val)
@@ -3,10 +3,11 @@
 """Unit tests for form handling."""
 
 import unittest
-try:
-    from urllib.parse import urlencode #py3
-except ImportError:
-    from urllib import urlencode #py2
+import threading
+import decimal
+import subprocess
+import sys
+from urllib.parse import urlencode
 
 import tornado.web
 import tornado.testing
@@ -33,6 +34,13 @@ max_value_form =Form(test=IntField(max_value=168))
 more_complex_form =Form(some_text=TextField(required=True),
     an_int=IntField(max_value=168))
 
+decimal_form =Form(test=DecimalField(min_value=-10, max_value=100,
+    max_digits=6, decimal_places=2))
+
+float_form =Form(test=FloatField(max_value=100))
+
+regex_form =Form(test=TextField(regex=r'[a-z]+\Z'))
+
 unpythonic_field_names_form =Form(**{
     '-23432dsf-sd': TextField(required=True),
     '**dfswdfhe': IntField(max_value=168)
@@ -179,6 +187,352 @@ class MinMaxValueTests(unittest.TestCase):
         })
         self.assertEqual(len(errors), 0)
 
+class NumericTests(unittest.TestCase):    
+    """Test numeric coercion and overflow guards.
+    """
+    
+    def test_int_invalid_fails(self):
+        cleaned_data, errors = min_value_form.validate({
+            'test': '12abc'
+        })
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(str(errors['test'][0]), IntField.message)
+        
+    def test_int_too_long_fails(self):
+        cleaned_data, errors = min_value_form.validate({
+            'test': '9' * 5000
+        })
+        self.assertEqual(len(errors), 1)
+        self.assertFalse('test' in cleaned_data)
+        
+    def test_int_overflow_fails_max(self):
+        cleaned_data, errors = max_value_form.validate({
+            'test': '9' * 200
+        })
+        self.assertEqual(len(errors), 1)
+        msg =tornforms.requirements.MaxValue.message.format(limit=168)
+        self.assertEqual(str(errors['test'][0]), msg)
+        
+    def test_int_leading_zeros_pass(self):
+        cleaned_data, errors = max_value_form.validate({
+            'test': '-000000000000000000007'
+        })
+        self.assertEqual(len(errors), 0)
+        self.assertEqual(cleaned_data['test'], -7)
+        
+    def test_decimal_point_passes(self):
+        cleaned_data, errors = decimal_form.validate({
+            'test': '12.50'
+        })
+        self.assertEqual(len(errors), 0)
+        self.assertEqual(cleaned_data['test'], decimal.Decimal('12.50'))
+        
+    def test_decimal_places_fails(self):
+        cleaned_data, errors = decimal_form.validate({
+            'test': '12.505'
+        })
+        self.assertEqual(len(errors), 1)
+        msg =tornforms.requirements.DecimalPlaces.message.format(places=2)
+        self.assertEqual(str(errors['test'][0]), msg)
+        
+    def test_decimal_max_digits_fails(self):
+        cleaned_data, errors = decimal_form.validate({
+            'test': '0.0000001'
+        })
+        self.assertEqual(len(errors), 1)
+        msg =tornforms.requirements.MaxDigits.message.format(digits=6)
+        self.assertEqual(str(errors['test'][0]), msg)
+        
+    def test_decimal_exponent_fails(self):
+        cleaned_data, errors = decimal_form.validate({
+            'test': '1e999999'
+        })
+        self.assertEqual(len(errors), 1)
+        msg =tornforms.requirements.MaxDigits.message.format(digits=6)
+        self.assertEqual(str(errors['test'][0]), msg)
+        
+    def test_decimal_exponent_passes(self):
+        form = Form(test=DecimalField())
+        for val in ('1E+3', '1e3', decimal.Decimal('1E+3')):
+            cleaned_data, errors = form.validate({
+                'test': val
+            })
+            self.assertEqual(len(errors), 0)
+            self.assertEqual(cleaned_data['test'], decimal.Decimal(1000))
+            
+    def test_decimal_negative_exponent_places_fails(self):
+        cleaned_data, errors = decimal_form.validate({
+            'test': '1e-3'
+        })
+        self.assertEqual(len(errors), 1)
+        msg =tornforms.requirements.DecimalPlaces.message.format(places=2)
+        self.assertEqual(str(errors['test'][0]), msg)
+        
+    def test_decimal_native_places_fails(self):
+        cleaned_data, errors = decimal_form.validate({
+            'test': decimal.Decimal('1.005')
+        })
+        self.assertEqual(len(errors), 1)
+        msg =tornforms.requirements.DecimalPlaces.message.format(places=2)
+        self.assertEqual(str(errors['test'][0]), msg)
+        
+    def test_decimal_validations(self):
+        validations = decimal_form.validations()['test']
+        self.assertEqual(validations['maxDigits']['value'], 6)
+        self.assertEqual(validations['decimalPlaces']['value'], 2)
+        
+    def test_decimal_overflow_fails_min(self):
+        cleaned_data, errors = decimal_form.validate({
+            'test': '-100.5'
+        })
+        self.assertEqual(len(errors), 1)
+        msg =tornforms.requirements.MinValue.message.format(limit=-10)
+        self.assertEqual(str(errors['test'][0]), msg)
+        
+    def test_float_passes(self):
+        cleaned_data, errors = float_form.validate({
+            'test': '.5'
+        })
+        self.assertEqual(len(errors), 0)
+        self.assertEqual(cleaned_data['test'], 0.5)
+        
+    def test_decimal_context_unchanged(self):
+        field = DecimalField(context=decimal.Context(prec=10, Emax=3))
+        cleaned_data, errors = Form(test=field).validate({
+            'test': '99999'
+        })
+        self.assertEqual(len(errors), 1)
+        self.assertFalse(any(field.context.flags.values()))
+        
+    def test_int_infinite_limit_passes(self):
+        form = Form(test=IntField(max_value=float('inf')))
+        cleaned_data, errors = form.validate({
+            'test': '5'
+        })
+        self.assertEqual(len(errors), 0)
+        self.assertEqual(cleaned_data['test'], 5)
+        
+    @unittest.skipUnless(hasattr(sys, 'get_int_max_str_digits'),
+        "no int string conversion limit")
+    def test_int_max_digits_limit(self):
+        limit = sys.get_int_max_str_digits()
+        if not limit:
+            self.skipTest("int string conversion limit disabled")
+        self.assertRaises(ValueError, IntField, max_digits=limit + 1)
+        
+    def test_int_wrong_sign_fails(self):
+        field = IntField(min_value=2)
+        cleaned_data, errors = Form(test=field).validate({
+            'test': '-' + '9' * 4000
+        })
+        self.assertEqual(len(errors), 1)
+        msg =tornforms.requirements.MinValue.message.format(limit=2)
+        self.assertEqual(str(errors['test'][0]), msg)
+        # Rejected before conversion
+        self.assertRaises(FormError, field.to_python, '-' + '9' * 4000)
+        
+    def test_int_native_passes(self):
+        cleaned_data, errors = max_value_form.validate({
+            'test': 12
+        })
+        self.assertEqual(len(errors), 0)
+        self.assertEqual(cleaned_data['test'], 12)
+        
+    def test_float_exponent_passes(self):
+        form = Form(test=FloatField())
+        for val, expected in ((1e-05, 1e-05), (1e20, 1e20), ('1e-7', 1e-7)):
+            cleaned_data, errors = form.validate({
+                'test': val
+            })
+            self.assertEqual(len(errors), 0)
+            self.assertEqual(cleaned_data['test'], expected)
+        
+    def test_float_overflow_fails(self):
+        form = Form(test=FloatField(max_digits=400))
+        cleaned_data, errors = form.validate({
+            'test': '9' * 400
+        })
+        self.assertEqual(len(errors), 1)
+        self.assertFalse('test' in cleaned_data)
+        
+    def test_float_invalid_fails(self):
+        cleaned_data, errors = float_form.validate({
+            'test': 'nan'
+        })
+        self.assertEqual(len(errors), 1)
+
+class RegexTests(unittest.TestCase):    
+    """Test regex requirement pass/fail.
+    """
+    
+    def test_string_regex_passes(self):
+        cleaned_data, errors = regex_form.validate({
+            'test': 'abc'
+        })
+        self.assertEqual(len(errors), 0)
+        
+    def test_string_regex_fails(self):
+        cleaned_data, errors = regex_form.validate({
+            'test': 'abc1'
+        })
+        self.assertEqual(len(errors), 1)
+        
+    def test_regex_validations(self):
+        validations = regex_form.validations()
+        self.assertEqual(validations['test']['regex']['value'], r'[a-z]+\Z')
+
+class ImportTests(unittest.TestCase):
+    """Test package imports.
+    """
+    
+    def test_lazy_import(self):
+        code = ("import sys, tornforms; "
+            "print(sorted(m for m in sys.modules if m.startswith('tornforms')))")
+        out = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(out.decode('utf-8').strip(), "['tornforms']")
+        
+    def test_exports(self):
+        import tornforms
+        for name in tornforms.__all__:
+            self.assertTrue(hasattr(tornforms, name))
+        
+    def test_submodule_access(self):
+        code = ("import tornforms; "
+            "print(tornforms.fields.__name__, tornforms.forms.__name__, "
+            "tornforms.utils.__name__, tornforms.requirements.__name__)")
+        out = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(out.decode('utf-8').split(), ['tornforms.fields',
+            'tornforms.forms', 'tornforms.utils', 'tornforms.requirements'])
+        
+    def test_missing_attribute(self):
+        import tornforms
+        try:
+            tornforms.not_a_name
+        except AttributeError as e:
+            self.assertTrue(e.__cause__ is None)
+            self.assertTrue(e.__suppress_context__)
+        else:
+            self.fail("AttributeError not raised")
+
+shared_form =Form(some_text=TextField(required=True, min_length=3),
+    an_int=IntField(min_value=2, max_value=168))
+
+class FakeLocale(object):
+    def __init__(self, code):
+        self.code = code
+        
+    def translate(self, message):
+        return "{0}: {1}".format(self.code, message)
+
+class FakeHandler(object):
+    """Minimal stand-in for a RequestHandler, to bind forms from threads."""
+    def __init__(self, arguments, locale):
+        self.arguments = arguments
+        self.locale = FakeLocale(locale)
+        
+    def get_argument(self, name, default=None, strip=True):
+        return self.arguments.get(name, default)
+        
+    @with_form(shared_form)
+    def post(self):
+        return self.form
+
+class ConcurrencyTests(unittest.TestCase):
+    """Bind one shared form from many threads.
+    """
+    def test_shared_form_threads(self):
+        barrier = threading.Barrier(16)
+        bound_forms, failures = [], []
+        
+        def worker(seed):
+            barrier.wait()
+            for x in range(100):
+                valid = (seed + x) % 2 == 0
+                locale = "{0}-{1}".format(seed, x)
+                handler = FakeHandler({
+                    'some_text': 'foobar' if valid else 'f',
+                    'an_int': str(seed + 2) if valid else '999'
+                }, locale)
+                bound = handler.post()
+                bound.add_error('extra', "Added by {seed}", seed=locale)
+                bound_forms.append((locale, valid, bound))
+                
+                expected = set(['extra']) if valid else set(['extra',
+                    'some_text', 'an_int'])
+                if set(bound.errors) != expected or bound.is_valid != valid:
+                    failures.append((locale, bound.errors))
+                elif valid and bound.data['an_int'] != seed + 2:
+                    failures.append((locale, bound.data))
+        
+        threads = [threading.Thread(target=worker, args=(seed,))
+            for seed in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(failures, [])
+        self.assertEqual(len(bound_forms), 1600)
+        for locale, valid, bound in bound_forms:
+            # Each request only sees its own errors, translated with its
+            # own locale
+            self.assertEqual(len(bound.errors['extra']), 1)
+            self.assertEqual(str(bound.errors['extra'][0]),
+                "Added by {0}".format(locale))
+            for name in ('some_text', 'an_int'):
+                for error in bound.errors.get(name, []):
+                    self.assertTrue(error.startswith(locale + ': '))
+        
+        # No per-request state is kept on the shared form
+        self.assertFalse(hasattr(shared_form, 'errors'))
+        self.assertFalse(hasattr(shared_form, 'data'))
+        
+    def test_requirements_immutable(self):
+        choices = ['foo', 'bar']
+        field = TextField(required=True, in_list=choices)
+        choices.append('baz')
+        
+        self.assertTrue(isinstance(field.reqs, tuple))
+        cleaned_data, errors = Form(test=field).validate({'test': 'baz'})
+        self.assertEqual(len(errors), 1)
+        
+    def test_set_requirements_immutable(self):
+        choices = set(['foo', 'bar'])
+        form = Form(test=TextField(in_list=choices),
+            other=TextField(not_in_list=choices))
+        choices.add('baz')
+        
+        cleaned_data, errors = form.validate({'test': 'baz', 'other': 'baz'})
+        self.assertEqual(list(errors.keys()), ['test'])
+        self.assertEqual(form.validations()['test']['inList']['value'],
+            ['bar', 'foo'])
+        self.assertEqual(str(errors['test'][0]),
+            "This field must be one of: bar, foo.")
+        
+    def test_range_requirement_not_copied(self):
+        values = range(10 ** 9)
+        field = IntField(in_list=values)
+        
+        self.assertTrue(field.reqs[0].args[0] is values)
+        cleaned_data, errors = Form(test=field).validate({'test': '12'})
+        self.assertEqual(len(errors), 0)
+        
+    def test_decimal_context_copied(self):
+        field = DecimalField(max_digits=6)
+        field.context.prec = 2
+        
+        self.assertEqual(field.context.prec, 6)
+        
+    def test_form_fields_immutable(self):
+        form = Form(test=TextField(required=True))
+        
+        def replace_field():
+            form.fields['test'] = TextField()
+        
+        self.assertRaises(TypeError, replace_field)
+        cleaned_data, errors = form.validate({})
+        self.assertEqual(len(errors), 1)
+
 class FormWrapperHandler(tornado.web.RequestHandler):
     
     @with_form(more_complex_form)
@@ -245,6 +599,10 @@ def suite():
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(RequiredTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(MinMaxLengthTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(MinMaxValueTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(NumericTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(RegexTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(ImportTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(ConcurrencyTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(FormWrapperTests))
     
     return suite